@@ -7,18 +7,14 @@ A simple GUI to test different Piper TTS voice models.
 import os
 import sys
 import logging
-from typing import Dict, List, Optional
-import subprocess
-from datetime import datetime
+from collections import deque
+from typing import Dict
 
-from PyQt5.QtWidgets import (
-    QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QLabel, QTextEdit, QPushButton, QComboBox, QGroupBox,
-    QFileDialog, QMessageBox, QProgressBar, QSlider, QSpinBox
-)
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtWidgets import QApplication, QMessageBox
+from PyQt5.QtCore import QProcess
 
-from piper_utils import PiperTTS, get_output_filename
+from piper_utils import PiperTTS
+from tts_app_base import BaseTTSApp, SynthesizeFn
 
 # Configure logging
 logging.basicConfig(
@@ -34,254 +30,140 @@ logger = logging.getLogger("PiperApp")
 # Create output directory if it doesn't exist
 os.makedirs("output", exist_ok=True)
 
-
-class SynthesisThread(QThread):
-    """Thread for running speech synthesis in the background."""
-    update_progress = pyqtSignal(int)
-    synthesis_complete = pyqtSignal(str, bool, str)
-    
-    def __init__(self, piper: PiperTTS, text: str, model_name: str, 
-                 output_file: str, speaker_id: Optional[int] = None):
-        super().__init__()
-        self.piper = piper
-        self.text = text
-        self.model_name = model_name
-        self.output_file = output_file
-        self.speaker_id = speaker_id
-    
-    def run(self):
-        """Run the synthesis process."""
-        self.update_progress.emit(10)
-        success, message = self.piper.synthesize(
-            self.text, self.model_name, self.output_file, self.speaker_id
-        )
-        self.update_progress.emit(100)
-        self.synthesis_complete.emit(self.model_name, success, message)
+# Only include models shown in the screenshot
+_TARGET_MODELS = frozenset(("en_US-joe-medium", "en_US-libritts_r-medium"))
 
 
-class PiperTTSApp(QMainWindow):
+class PiperTTSApp(BaseTTSApp):
     """Main application window for Piper TTS testing."""
     
+    window_title = "Piper TTS Test App"
+    default_text = "Hello, this is a test of the Piper text-to-speech system."
+    
     def __init__(self, piper_executable=None):
         super().__init__()
         
         # Initialize Piper TTS with optional executable path
         self.piper = PiperTTS(piper_executable=piper_executable)
-        self.threads = []  # Keep track of running threads
+        
+        # Without in-process voices, each model gets a persistent piper QProcess
+        self._procs: Dict[str, QProcess] = {}
+        self._proc_stderr: Dict[str, deque] = {}
         
         self.available_models = self.piper.list_models()
         
+        self.model_names = [m for m in self.available_models if m in _TARGET_MODELS]
+        
         if not self.available_models:
             QMessageBox.warning(
                 self, "No Models Found", 
                 "No Piper TTS models found in the 'models/tts' directory. "
                 "Please make sure you have the voice models installed correctly."
             )
+        elif not self.model_names:
+            QMessageBox.warning(
+                self, "No Models Found", 
+                "None of the expected voice models "
+                f"({', '.join(sorted(_TARGET_MODELS))}) were found in the 'models/tts' directory."
+            )
         
         self.setup_ui()
-    
-    def setup_ui(self):
-        """Set up the user interface."""
-        self.setWindowTitle("Piper TTS Test App")
-        self.setGeometry(100, 100, 800, 600)
-        
-        # Main widget and layout
-        main_widget = QWidget()
-        main_layout = QVBoxLayout()
-        main_widget.setLayout(main_layout)
-        self.setCentralWidget(main_widget)
-        
-        # Input text group
-        input_group = QGroupBox("Input Text")
-        input_layout = QVBoxLayout()
-        
-        self.text_input = QTextEdit()
-        self.text_input.setPlaceholderText("Enter text to convert to speech...")
-        self.text_input.setText("Hello, this is a test of the Piper text-to-speech system.")
-        
-        input_layout.addWidget(self.text_input)
-        input_group.setLayout(input_layout)
-        main_layout.addWidget(input_group)
-        
-        # Models group
-        models_group = QGroupBox("Voice Models")
-        models_layout = QVBoxLayout()
-        
-        # List of selected models to process
-        self.model_checkboxes = {}
-        
-        # Only include models shown in the screenshot
-        target_models = ["en_US-joe-medium", "en_US-libritts_r-medium"]
-        
-        for model_name in self.available_models:
-            # Skip models not in our target list
-            if model_name not in target_models:
-                continue
-                
-            model_layout = QHBoxLayout()
-            
-            # Model name label
-            model_label = QLabel(model_name)
-            model_layout.addWidget(model_label)
-            
-            # Progress bar
-            progress_bar = QProgressBar()
-            progress_bar.setRange(0, 100)
-            progress_bar.setValue(0)
-            model_layout.addWidget(progress_bar)
-            
-            # Play button
-            play_button = QPushButton("Play")
-            play_button.setEnabled(False)  # Disabled until synthesis is complete
-            play_button.clicked.connect(lambda checked, mn=model_name: self.play_audio(mn))
-            model_layout.addWidget(play_button)
-            
-            # Store the widgets for this model
-            self.model_checkboxes[model_name] = {
-                "progress_bar": progress_bar,
-                "play_button": play_button,
-                "output_file": None  # Will be set after synthesis
-            }
-            
-            models_layout.addLayout(model_layout)
-        
-        models_group.setLayout(models_layout)
-        main_layout.addWidget(models_group)
-        
-        # Control buttons
-        control_layout = QHBoxLayout()
-        
-        self.synthesize_button = QPushButton("Synthesize All")
-        self.synthesize_button.clicked.connect(self.synthesize_all)
-        control_layout.addWidget(self.synthesize_button)
         
-        self.stop_button = QPushButton("Stop")
-        self.stop_button.clicked.connect(self.stop_all)
-        self.stop_button.setEnabled(False)
-        control_layout.addWidget(self.stop_button)
-        
-        main_layout.addLayout(control_layout)
+        # Start the piper processes now so the models are loaded before the first request
+        if not self.piper.in_process:
+            for model_name in self.model_checkboxes:
+                self._start_proc(model_name)
+    
+    def synthesize_fn(self, model_name: str) -> SynthesizeFn:
+        """Get the synthesis function for a model."""
+        def synthesize(text, output_file, speaker_id):
+            return self.piper.synthesize(text, model_name, output_file, speaker_id)
+        return synthesize
     
-    def synthesize_all(self):
-        """Synthesize speech for all selected models."""
-        # Get the input text
-        text = self.text_input.toPlainText().strip()
-        if not text:
-            QMessageBox.warning(self, "Empty Text", "Please enter some text to synthesize.")
+    def start_synthesis(self, text: str, model_name: str, output_file: str):
+        """Start synthesis for one model, through its piper process if there is one."""
+        if self.piper.in_process:
+            super().start_synthesis(text, model_name, output_file)
             return
         
-        # Disable the synthesize button and enable the stop button
-        self.synthesize_button.setEnabled(False)
-        self.stop_button.setEnabled(True)
-        
-        # Reset progress bars and play buttons
-        for model_info in self.model_checkboxes.values():
-            model_info["progress_bar"].setValue(0)
-            model_info["play_button"].setEnabled(False)
-            model_info["output_file"] = None
-        
-        # Start synthesis for each model
-        for model_name in self.model_checkboxes:
-            # Generate output filename
-            output_file = get_output_filename(text, model_name)
-            self.model_checkboxes[model_name]["output_file"] = output_file
-            
-            # Create and start the synthesis thread
-            thread = SynthesisThread(self.piper, text, model_name, output_file)
-            thread.update_progress.connect(
-                lambda value, mn=model_name: self.update_progress(mn, value)
-            )
-            thread.synthesis_complete.connect(self.synthesis_complete)
-            
-            self.threads.append(thread)
-            thread.start()
-    
-    def update_progress(self, model_name: str, value: int):
-        """Update the progress bar for a model."""
-        if model_name in self.model_checkboxes:
-            self.model_checkboxes[model_name]["progress_bar"].setValue(value)
+        # Hand the request to the model's piper process; it reports back via signals
+        proc = self._procs.get(model_name)
+        if proc is None or proc.state() == QProcess.NotRunning:
+            proc = self._start_proc(model_name)
+        proc.write(self.piper.process_request(text, model_name, output_file))
+        self.update_progress(model_name, 10)
     
     def synthesis_complete(self, model_name: str, success: bool, message: str):
-        """Handle completion of synthesis for a model."""
-        if model_name in self.model_checkboxes:
-            # Set progress to 100% and enable play button if successful
-            self.model_checkboxes[model_name]["progress_bar"].setValue(100)
-            self.model_checkboxes[model_name]["play_button"].setEnabled(success)
-            
-            # Log the result
-            if success:
-                logger.info(f"Synthesis completed for {model_name}: {message}")
-            else:
-                logger.error(f"Synthesis failed for {model_name}: {message}")
-                QMessageBox.warning(
-                    self, "Synthesis Failed", 
-                    f"Failed to synthesize speech for {model_name}:\n{message}"
-                )
+        """Handle completion of synthesis for a model, keeping in-memory audio for playback."""
+        if success and model_name in self.model_checkboxes:
+            model_info = self.model_checkboxes[model_name]
+            model_info["audio_bytes"] = self.piper.get_audio(model_name, model_info["output_file"])
         
-        # Check if all threads are done
-        all_done = all(not thread.isRunning() for thread in self.threads)
-        if all_done:
-            self.synthesis_complete_all()
-    
-    def synthesis_complete_all(self):
-        """Handle completion of all synthesis tasks."""
-        # Clean up the threads list
-        self.threads = [thread for thread in self.threads if thread.isRunning()]
-        
-        # Re-enable the synthesize button and disable the stop button
-        self.synthesize_button.setEnabled(True)
-        self.stop_button.setEnabled(False)
-        
-        # Show a completion message
-        QMessageBox.information(
-            self, "Synthesis Complete", 
-            "Speech synthesis is complete for all models."
-        )
+        super().synthesis_complete(model_name, success, message)
     
     def stop_all(self):
-        """Stop all running synthesis threads."""
-        # Terminate all running threads
-        for thread in self.threads:
-            if thread.isRunning():
-                thread.terminate()
-                thread.wait()
-        
-        # Clear the threads list
-        self.threads = []
+        """Stop all running synthesis workers and piper processes."""
+        # piper processes can be killed safely; they are restarted on the next request
+        for model_name in self._pending:
+            if model_name in self._procs:
+                self._procs.pop(model_name).kill()
         
-        # Re-enable the synthesize button and disable the stop button
-        self.synthesize_button.setEnabled(True)
-        self.stop_button.setEnabled(False)
-        
-        # Show a message
-        QMessageBox.information(
-            self, "Synthesis Stopped", 
-            "Speech synthesis has been stopped."
-        )
+        super().stop_all()
     
-    def play_audio(self, model_name: str):
-        """Play the generated audio file for a model."""
-        output_file = self.model_checkboxes[model_name]["output_file"]
-        if not output_file or not os.path.exists(output_file):
-            QMessageBox.warning(
-                self, "File Not Found", 
-                f"Audio file for {model_name} not found."
-            )
-            return
-        
-        # Use the operating system's default audio player
-        try:
-            if sys.platform == "win32":
-                os.startfile(output_file)
-            elif sys.platform == "darwin":  # macOS
-                subprocess.run(["open", output_file], check=True)
-            else:  # Linux and other Unix-like systems
-                subprocess.run(["xdg-open", output_file], check=True)
-        except Exception as e:
-            QMessageBox.warning(
-                self, "Playback Error", 
-                f"Failed to play audio file: {str(e)}"
+    def _start_proc(self, model_name: str) -> QProcess:
+        """Start the persistent piper process for a model."""
+        proc = QProcess(self)
+        proc.readyReadStandardOutput.connect(lambda mn=model_name: self._proc_output(mn))
+        proc.readyReadStandardError.connect(lambda mn=model_name: self._proc_error_output(mn))
+        proc.errorOccurred.connect(lambda error, mn=model_name: self._proc_failed(mn, proc))
+        proc.finished.connect(lambda code, status, mn=model_name: self._proc_failed(mn, proc))
+        
+        self._procs[model_name] = proc
+        self._proc_stderr[model_name] = deque(maxlen=20)
+        proc.start(self.piper.piper_executable, self.piper.process_args(model_name))
+        return proc
+    
+    def _proc_output(self, model_name: str):
+        """Handle output paths printed by a piper process as it finishes requests."""
+        proc = self._procs.get(model_name)
+        while proc is not None and proc.canReadLine():
+            output_file = bytes(proc.readLine()).decode("utf-8", "replace").strip()
+            if model_name in self._pending:
+                self.synthesis_complete(
+                    model_name, True, f"Speech generated successfully and saved to {output_file}"
+                )
+    
+    def _proc_error_output(self, model_name: str):
+        """Keep the last lines a piper process logged, for error reporting."""
+        proc = self._procs.get(model_name)
+        if proc is not None:
+            self._proc_stderr[model_name].append(bytes(proc.readAllStandardError()))
+    
+    def _proc_failed(self, model_name: str, proc: QProcess):
+        """Handle a piper process that failed to start or exited."""
+        # Free the process once it has stopped; this runs again with finished
+        # after errorOccurred reports a crash, while the process is still running
+        if proc.state() == QProcess.NotRunning:
+            proc.deleteLater()
+        
+        if self._procs.get(model_name) is not proc:
+            return  # Already replaced, e.g. killed by stop_all
+        del self._procs[model_name]
+        
+        if model_name in self._pending:
+            stderr = b"".join(self._proc_stderr[model_name]).decode("utf-8", "replace")
+            self.synthesis_complete(
+                model_name, False, f"Piper TTS failed with error: {proc.errorString()}\n{stderr}"
             )
+    
+    def closeEvent(self, event):
+        """Shut down the persistent piper processes when the window closes."""
+        self._pending = set()
+        for proc in list(self._procs.values()):
+            proc.kill()
+            proc.waitForFinished(1000)
+        self.piper.close()
+        super().closeEvent(event)
 
 
 def main():
@@ -0,0 +1,56 @@
+"""
+Output filename helpers shared by the Piper TTS clients and GUI applications.
+
+Only the standard library is imported here, so the Docker client and the GUI
+can use these without loading piper_utils and its optional dependencies.
+"""
+import os
+import functools
+
+
+class _SafeCharTable(dict):
+    """A str.translate table mapping every non-alphanumeric character to "_"."""
+    
+    def __missing__(self, codepoint: int) -> str:
+        char = chr(codepoint)
+        self[codepoint] = char if char.isalnum() else "_"
+        return self[codepoint]
+
+
+# ASCII is filled in up front; other characters are added on first use
+_SAFE_TABLE = _SafeCharTable((i, chr(i) if chr(i).isalnum() else "_") for i in range(128))
+
+
+def safe_text(text: str) -> str:
+    """
+    Make a filename-safe prefix from text.
+    
+    Args:
+        text: The input text
+    
+    Returns:
+        The first 30 characters of text, with non-alphanumeric characters replaced by "_"
+    """
+    return text[:30].translate(_SAFE_TABLE)
+
+
+@functools.lru_cache(maxsize=128)
+def get_output_filename(text: str, model_name: str, output_dir: str = "output") -> str:
+    """
+    Generate a unique output filename based on the text and model name.
+    
+    Args:
+        text: The input text
+        model_name: The voice model name
+        output_dir: Directory to save output files
+    
+    Returns:
+        A file path for the output audio file
+    """
+    # Create the filename
+    filename = f"{safe_text(text)}_{model_name}.wav"
+    
+    # Full path
+    file_path = os.path.join(output_dir, filename)
+    
+    return file_path
@@ -6,28 +6,93 @@ import logging
 import subprocess
 import json
 import sys
+import shutil
+import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Optional, List, Tuple
 
+from filenames import get_output_filename  # Re-exported for existing callers
+from wavfile import wav_header
+
+try:
+    import onnxruntime
+    from piper import PiperVoice
+    from piper.config import PiperConfig
+except ImportError:
+    # Fall back to the piper command-line executable
+    PiperVoice = None
+else:
+    if not hasattr(PiperVoice, "synthesize_stream_raw"):
+        # piper-tts 1.3 changed the API used here; use the executable instead
+        PiperVoice = None
+
+# Where the path of the piper executable is remembered between runs
+_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "piper-tts-test", "piper_path")
+
+# Accelerated ONNX Runtime execution providers, in order of preference
+_GPU_PROVIDERS = ["CUDAExecutionProvider", "DmlExecutionProvider", "CoreMLExecutionProvider"]
+
+# Long input is cut into chunks of at most this many characters, synthesized
+# concurrently; piper splits each chunk into sentences itself
+_MAX_CHUNK_CHARS = 200
+
+# A sentence end a chunk can be cut after, with the word before it
+_SENT_END_RE = re.compile(r'(\S*)[.!?]["\')\]]*(?=\s)')
+
+# Words ending in a period that don't end a sentence
+_ABBREVIATIONS = frozenset({
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "mt", "vs", "etc",
+    "e.g", "i.e", "no", "inc", "ltd", "co", "jan", "feb", "mar", "apr",
+    "jun", "jul", "aug", "sep", "sept", "oct", "nov", "dec",
+})
+
+# Dummy synthesis runs done when a voice is loaded
+_WARMUP_RUNS = 1
+_WARMUP_TEXT = "Warm up."
+
+
 class PiperTTS:
-    """A wrapper for the Piper TTS command-line executable."""
+    """
+    A wrapper for Piper TTS.
+    
+    Voices run in-process through the piper Python package when it is installed,
+    otherwise through a persistent piper command-line process per model.
+    """
     
-    def __init__(self, models_dir: str = "./models/tts", piper_executable: str = None):
+    def __init__(self, models_dir: str = "./models/tts", piper_executable: str = None,
+                 use_gpu: Optional[bool] = None):
         """
         Initialize the PiperTTS class.
         
         Args:
             models_dir: Directory containing the voice model files
             piper_executable: Path to the piper executable (default: auto-detect)
+            use_gpu: Use a GPU execution provider for in-process voices
+                (default: whenever one is available; False forces CPU)
         """
         self.models_dir = models_dir
-        self.available_models = self._find_models()
         self.logger = logging.getLogger("PiperTTS")
+        self.available_models = self._find_models()
         
         # Find the piper executable
         self.piper_executable = piper_executable
         if not self.piper_executable:
             self.piper_executable = self._find_piper_executable()
         
+        # Loaded voices (or persistent piper processes), one per model, started on first use
+        self._voices: Dict[str, "PiperVoice"] = {}
+        self._procs: Dict[str, subprocess.Popen] = {}
+        self._model_locks: Dict[str, threading.Lock] = {}
+        self._stderr_tails: Dict[str, deque] = {}
+        self._stderr_threads: Dict[str, threading.Thread] = {}
+        self._last_audio: Dict[str, Tuple[str, bytes]] = {}
+        self._providers = self._select_providers(use_gpu)
+        
+        # Lets the next chunk's inference start while the previous one finishes
+        self._executor = ThreadPoolExecutor(max_workers=2)
+        
         # Create output directory if it doesn't exist
         os.makedirs("output", exist_ok=True)
     
@@ -35,61 +100,88 @@ class PiperTTS:
         """
         Find the piper executable.
         
+        The path found is cached on disk and reused until it no longer exists.
+        
         Returns:
             Path to the piper executable
         """
+        # Reuse the path found last time if it is still there
+        try:
+            with open(_CACHE_PATH, 'r', encoding='utf-8') as f:
+                cached_path = f.read().strip()
+            if cached_path and os.path.exists(cached_path):
+                return cached_path
+        except OSError:
+            pass
+        
+        path = self._discover_piper_executable()
+        if path is None:
+            self.logger.warning("Could not find piper in PATH. Please specify the path to the piper executable.")
+            # Default to just "piper", hoping it's in the PATH
+            return "piper.exe" if sys.platform == "win32" else "piper"
+        
+        try:
+            os.makedirs(os.path.dirname(_CACHE_PATH), exist_ok=True)
+            with open(_CACHE_PATH, 'w', encoding='utf-8') as f:
+                f.write(path)
+        except OSError as e:
+            self.logger.warning(f"Could not cache the piper executable path: {e}")
+        
+        return path
+    
+    @staticmethod
+    def _discover_piper_executable() -> Optional[str]:
+        """
+        Search the usual locations and the PATH for the piper executable.
+        
+        Returns:
+            Absolute path to the piper executable, or None if it wasn't found
+        """
         # Check if piper is in the current directory
-        if os.path.exists("piper"):
-            return "./piper"
-        elif os.path.exists("piper.exe"):
-            return "./piper.exe"
+        potential_paths = ["piper", "piper.exe"]
+        if sys.platform == "win32":
+            # On Windows, also check common locations
+            potential_paths += [
+                "../piper.exe",
+                "../../piper.exe",
+                "./piper/piper.exe",
+                "../piper/piper.exe"
+            ]
+        for path in potential_paths:
+            if os.path.exists(path):
+                return os.path.abspath(path)
         
         # Check if piper is in the PATH
-        try:
-            if sys.platform == "win32":
-                # On Windows, check common locations
-                potential_paths = [
-                    "./piper.exe",
-                    "../piper.exe",
-                    "../../piper.exe",
-                    "./piper/piper.exe",
-                    "../piper/piper.exe"
-                ]
-                for path in potential_paths:
-                    if os.path.exists(path):
-                        return path
-                
-                # If not found, assume it's in the PATH
-                return "piper.exe"
-            else:
-                # On Unix systems
-                subprocess.run(["which", "piper"], check=True, stdout=subprocess.PIPE)
-                return "piper"
-        except (subprocess.SubprocessError, FileNotFoundError):
-            self.logger.warning("Could not find piper in PATH. Please specify the path to the piper executable.")
-            return "piper"  # Default to just "piper", hoping it's in the PATH
+        return shutil.which("piper")
     
-    def _find_models(self) -> Dict[str, str]:
+    def _find_models(self) -> Dict[str, Tuple[str, dict]]:
         """
         Find all available voice models in the models directory.
         
         Returns:
-            A dictionary mapping model names to their full paths
+            A dictionary mapping model names to their full paths and parsed JSON configs
         """
         models = {}
         
         if not os.path.exists(self.models_dir):
             return models
         
-        for filename in os.listdir(self.models_dir):
-            if filename.endswith(".onnx"):
+        # Collect model and config names in a single directory pass
+        onnx_names = set()
+        json_names = set()
+        with os.scandir(self.models_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(".onnx"):
+                    onnx_names.add(entry.name)
+                elif entry.name.endswith(".onnx.json"):
+                    json_names.add(entry.name)
+        
+        for filename in sorted(onnx_names):
+            # Check if the JSON config file also exists
+            if f"{filename}.json" in json_names:
                 model_name = os.path.splitext(filename)[0]
                 model_path = os.path.join(self.models_dir, filename)
-                
-                # Check if the JSON config file also exists
-                json_path = f"{model_path}.json"
-                if os.path.exists(json_path):
-                    models[model_name] = model_path
+                models[model_name] = (model_path, self._load_config(f"{model_path}.json"))
         
         return models
     
@@ -119,79 +211,309 @@ class PiperTTS:
         if model_name not in self.available_models:
             return False, f"Model '{model_name}' not found. Available models: {', '.join(self.list_models())}"
         
-        model_path = self.available_models[model_name]
-        json_path = f"{model_path}.json"
+        speaker_id = self._default_speaker(model_name, speaker_id)
         
-        # Build the command
-        cmd = [self.piper_executable, "--model", model_path, "--output_file", output_file]
+        # Run Piper TTS
+        try:
+            with self._model_locks.setdefault(model_name, threading.Lock()):
+                if PiperVoice is not None:
+                    return self._synthesize_in_process(text, model_name, output_file, speaker_id)
+                return self._synthesize_via_process(text, model_name, output_file, speaker_id)
+            
+        except Exception as e:
+            # Don't leave a process we gave up on running, e.g. after a broken pipe
+            process = self._procs.pop(model_name, None)
+            if process is not None:
+                self._stop_proc(process)
+            return False, f"Failed to run Piper TTS: {str(e)}"
+    
+    def _synthesize_in_process(self, text: str, model_name: str, output_file: str,
+                               speaker_id: Optional[int]) -> Tuple[bool, str]:
+        """Synthesize speech with an in-memory PiperVoice."""
+        voice = self._get_voice(model_name)
+        futures = [
+            self._executor.submit(self._synthesize_chunk, voice, chunk, speaker_id)
+            for chunk in _split_sentences(text)
+        ]
         
-        # Add speaker ID if provided
-        if speaker_id is not None:
-            cmd.extend(["--speaker", str(speaker_id)])
+        # Join the header and every chunk's PCM segments in order in a single
+        # allocation; the audio size is known up front, so the WAV header is
+        # packed directly
+        segments = [segment for future in futures for segment in future.result()]
+        header = wav_header(sum(map(len, segments)), voice.config.sample_rate)
+        audio = b"".join([header, *segments])
         
-        # Check if model is multi-speaker from the JSON config
-        if os.path.exists(json_path):
-            try:
-                with open(json_path, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                    if config.get('num_speakers', 1) > 1 and speaker_id is None:
-                        # Multi-speaker model, but no speaker ID was provided
-                        # Use the first speaker (0) by default
-                        cmd.extend(["--speaker", "0"])
-            except UnicodeDecodeError:
-                # Try with different encodings if utf-8 fails
-                try:
-                    with open(json_path, 'r', encoding='latin-1') as f:
-                        config = json.load(f)
-                        if config.get('num_speakers', 1) > 1 and speaker_id is None:
-                            cmd.extend(["--speaker", "0"])
-                except Exception as e:
-                    self.logger.warning(f"Could not read model config file with latin-1 encoding: {e}")
-            except (json.JSONDecodeError, IOError) as e:
-                self.logger.warning(f"Could not read model config file: {e}")
+        with open(output_file, "wb") as f:
+            f.write(audio)
+        self._last_audio[model_name] = (output_file, audio)
         
-        # Run Piper TTS
-        try:
-            # Use Popen to pipe text to the process
+        return True, f"Speech generated successfully and saved to {output_file}"
+    
+    def _select_providers(self, use_gpu: Optional[bool]) -> List[str]:
+        """
+        Pick the ONNX Runtime execution providers for in-process voices.
+        
+        Args:
+            use_gpu: Whether to use a GPU provider (None: if one is available)
+            
+        Returns:
+            Provider names in order of preference, always ending with the CPU
+        """
+        if PiperVoice is None or use_gpu is False:
+            return ["CPUExecutionProvider"]
+        
+        available = onnxruntime.get_available_providers()
+        providers = [provider for provider in _GPU_PROVIDERS if provider in available]
+        if use_gpu and not providers:
+            self.logger.warning("No GPU execution provider available, falling back to CPU.")
+        
+        return providers + ["CPUExecutionProvider"]
+    
+    def _session_options(self) -> "onnxruntime.SessionOptions":
+        """
+        Build ONNX Runtime session options for a voice.
+        
+        The CPU threads are split between the available models so that voices
+        synthesizing in parallel don't oversubscribe the CPU.
+        
+        Returns:
+            Session options with full graph optimizations enabled
+        """
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = max(1, (os.cpu_count() or 1) // max(1, len(self.available_models)))
+        options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+        return options
+    
+    def _synthesize_via_process(self, text: str, model_name: str, output_file: str,
+                                speaker_id: Optional[int]) -> Tuple[bool, str]:
+        """Synthesize speech with the model's persistent piper process."""
+        process = self._get_proc(model_name)
+        
+        # One JSON line per utterance; piper echoes the output path when done
+        process.stdin.write(self.process_request(text, model_name, output_file, speaker_id))
+        process.stdin.flush()
+        result = process.stdout.readline()
+        
+        if not result:
+            # The process exited; drop it so the next call starts a fresh one
+            del self._procs[model_name]
+            process.wait()
+            # Let the drain thread read the last lines, which usually hold the error
+            self._stderr_threads[model_name].join(timeout=1)
+            stderr = b"".join(self._stderr_tails[model_name])
+            return False, f"Piper TTS failed with error: {stderr.decode('utf-8', 'replace')}"
+        
+        return True, f"Speech generated successfully and saved to {output_file}"
+    
+    @staticmethod
+    def _synthesize_chunk(voice: "PiperVoice", text: str, speaker_id: Optional[int]) -> List[bytes]:
+        """Synthesize one chunk of text to raw 16-bit PCM, one segment per sentence."""
+        return list(voice.synthesize_stream_raw(text, speaker_id=speaker_id))
+    
+    def _get_voice(self, model_name: str) -> "PiperVoice":
+        """
+        Get the in-memory voice for a model, loading it if needed.
+        
+        Args:
+            model_name: The name of the voice model
+            
+        Returns:
+            A loaded and warmed-up PiperVoice
+        """
+        voice = self._voices.get(model_name)
+        if voice is None:
+            model_path, config = self.available_models[model_name]
+            session = onnxruntime.InferenceSession(
+                model_path,
+                sess_options=self._session_options(),
+                providers=self._providers
+            )
+            voice = PiperVoice(session=session, config=PiperConfig.from_dict(config))
+            
+            # Pay ONNX Runtime's one-time graph optimization cost up front
+            for _ in range(_WARMUP_RUNS):
+                self._synthesize_chunk(voice, _WARMUP_TEXT, 0)
+            
+            self._voices[model_name] = voice
+        return voice
+    
+    def get_audio(self, model_name: str, output_file: str) -> Optional[bytes]:
+        """
+        Get the WAV data of the last in-process synthesis, without re-reading the file.
+        
+        Args:
+            model_name: The name of the voice model
+            output_file: The path the audio was saved to
+            
+        Returns:
+            The WAV file contents, or None if they aren't held in memory
+        """
+        last_file, audio = self._last_audio.get(model_name, (None, None))
+        return audio if last_file == output_file else None
+    
+    @property
+    def in_process(self) -> bool:
+        """Whether voices run in-process through the piper Python package."""
+        return PiperVoice is not None
+    
+    def process_args(self, model_name: str) -> List[str]:
+        """
+        Get the arguments for a model's persistent piper process.
+        
+        Args:
+            model_name: The name of the voice model
+            
+        Returns:
+            The piper command-line arguments, excluding the executable
+        """
+        model_path, _ = self.available_models[model_name]
+        return ["--model", model_path, "--json-input", "--output_dir", "output"]
+    
+    def _default_speaker(self, model_name: str, speaker_id: Optional[int]) -> Optional[int]:
+        """
+        Get the speaker to request from a model.
+        
+        Args:
+            model_name: The name of the voice model to use
+            speaker_id: The requested speaker ID, or None
+            
+        Returns:
+            speaker_id, or the first speaker (0) of a multi-speaker model when it is None
+        """
+        _, config = self.available_models[model_name]
+        if speaker_id is None and config.get('num_speakers', 1) > 1:
+            return 0
+        return speaker_id
+    
+    def process_request(self, text: str, model_name: str, output_file: str,
+                        speaker_id: Optional[int] = None) -> bytes:
+        """
+        Encode a synthesis request for a model's persistent piper process.
+        
+        Args:
+            text: The input text to synthesize
+            model_name: The name of the voice model to use
+            output_file: The path to save the output audio file
+            speaker_id: Speaker ID for multi-speaker models (if applicable)
+            
+        Returns:
+            One JSON line to write to the process's stdin
+        """
+        speaker_id = self._default_speaker(model_name, speaker_id)
+        request = {"text": text, "output_file": output_file}
+        if speaker_id is not None:
+            request["speaker_id"] = speaker_id
+        return json.dumps(request).encode("utf-8") + b"\n"
+    
+    def _get_proc(self, model_name: str) -> subprocess.Popen:
+        """
+        Get the persistent piper process for a model, starting it if needed.
+        
+        Args:
+            model_name: The name of the voice model
+            
+        Returns:
+            A running piper process reading JSON requests from stdin
+        """
+        process = self._procs.get(model_name)
+        if process is None or process.poll() is not None:
             process = subprocess.Popen(
-                cmd,
+                [self.piper_executable] + self.process_args(model_name),
                 stdin=subprocess.PIPE,
                 stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
+                stderr=subprocess.PIPE
             )
+            self._procs[model_name] = process
             
-            # Send text to process
-            stdout, stderr = process.communicate(input=text)
-            
-            if process.returncode != 0:
-                return False, f"Piper TTS failed with error: {stderr}"
-            
-            return True, f"Speech generated successfully and saved to {output_file}"
+            # piper logs every utterance to stderr; keep draining it so the pipe
+            # never fills up, and remember the last lines for error reporting
+            tail = self._stderr_tails[model_name] = deque(maxlen=20)
+            thread = self._stderr_threads[model_name] = threading.Thread(
+                target=self._drain_stderr, args=(process, tail), daemon=True
+            )
+            thread.start()
+        return process
+    
+    @staticmethod
+    def _stop_proc(process: subprocess.Popen):
+        """Terminate a piper process and reap it, killing it if it doesn't exit in time."""
+        if process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+    
+    @staticmethod
+    def _drain_stderr(process: subprocess.Popen, tail: deque):
+        """Read a piper process's stderr until it exits, keeping the last lines."""
+        for line in process.stderr:
+            tail.append(line)
+    
+    def _load_config(self, json_path: str) -> dict:
+        """
+        Load a model's JSON config file.
+        
+        Args:
+            json_path: Path to the model's JSON config file
             
-        except Exception as e:
-            return False, f"Failed to run Piper TTS: {str(e)}"
+        Returns:
+            The parsed config, or an empty dict if it could not be read
+        """
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except UnicodeDecodeError:
+            # Try with different encodings if utf-8 fails
+            try:
+                with open(json_path, 'r', encoding='latin-1') as f:
+                    return json.load(f)
+            except Exception as e:
+                self.logger.warning(f"Could not read model config file with latin-1 encoding: {e}")
+        except (json.JSONDecodeError, IOError) as e:
+            self.logger.warning(f"Could not read model config file: {e}")
+        return {}
+    
+    def close(self):
+        """Release loaded voices and terminate all persistent piper processes."""
+        self._executor.shutdown(wait=False)
+        self._voices.clear()
+        self._last_audio.clear()
+        for process in self._procs.values():
+            self._stop_proc(process)
+        self._procs.clear()
 
 
-def get_output_filename(text: str, model_name: str, output_dir: str = "output") -> str:
+def _split_sentences(text: str) -> List[str]:
     """
-    Generate a unique output filename based on the text and model name.
+    Split text into chunks for synthesis.
+    
+    Text of up to _MAX_CHUNK_CHARS characters is kept whole. Longer text is cut
+    at the last sentence end that fits, skipping abbreviations and initials,
+    or else at the last space that fits.
     
     Args:
         text: The input text
-        model_name: The voice model name
-        output_dir: Directory to save output files
         
     Returns:
-        A file path for the output audio file
+        Non-empty chunks of at most _MAX_CHUNK_CHARS characters
     """
-    # Create a safe filename from the text (first 30 chars)
-    safe_text = "".join([c if c.isalnum() else "_" for c in text[:30]])
-    
-    # Create the filename
-    filename = f"{safe_text}_{model_name}.wav"
-    
-    # Full path
-    file_path = os.path.join(output_dir, filename)
-    
-    return file_path
+    chunks = []
+    text = text.strip()
+    while len(text) > _MAX_CHUNK_CHARS:
+        cut = 0
+        for match in _SENT_END_RE.finditer(text, 0, _MAX_CHUNK_CHARS + 1):
+            word = match.group(1).lstrip("\"'([").lower()
+            if word not in _ABBREVIATIONS and not (len(word) == 1 and word.isalpha()):
+                cut = match.end()
+        if cut <= 0:
+            cut = text.rfind(" ", 0, _MAX_CHUNK_CHARS + 1)
+        if cut <= 0:
+            cut = _MAX_CHUNK_CHARS
+        chunks.append(text[:cut].rstrip())
+        text = text[cut:].lstrip()
+    if text:
+        chunks.append(text)
+    return chunks
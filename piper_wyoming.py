@@ -2,31 +2,266 @@
 Wyoming protocol client for Piper TTS.
 """
 import socket
+import selectors
+import asyncio
+import functools
 import json
-import wave
+import binascii
 import io
-import base64
 import os
+import re
 import logging
 import time
-import sys
+import queue
+import threading
 import subprocess
+import warnings
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from filenames import safe_text
+from wavfile import WAV_HEADER_SIZE, wav_header
+
+try:
+    # SIMD-accelerated decoder, used for servers that send base64 audio
+    from pybase64 import b64decode
+except ImportError:
+    from base64 import b64decode
+
+try:
+    # Faster JSON for event headers; orjson.JSONDecodeError subclasses json's
+    import orjson
+    _loads = orjson.loads
+    _dumps = orjson.dumps
+except ImportError:
+    _decode = json.JSONDecoder().decode
+    
+    def _loads(data):
+        # Event headers are UTF-8; decoding straight to str skips json.loads's
+        # encoding detection, and works for memoryviews without a bytes copy
+        return _decode(data if isinstance(data, str) else str(data, "utf-8"))
+    
+    def _dumps(obj):
+        return json.dumps(obj).encode("utf-8")
 
 logger = logging.getLogger("PiperWyoming")
 
+# Synthesize event, with the JSON-encoded text and speaker filled in. The newline
+# separates JSON objects
+_REQUEST_TEMPLATE = b'{"type": "synthesize", "data": {"text": %s, "speaker": %s}}\n'
+
+_IO_TIMEOUT = 10  # Seconds to wait for the Wyoming server before giving up
+_RCVBUF_SIZE = 4 * 1024 * 1024  # Socket receive buffer, room for seconds of audio
+
+# Audio format assumed until a server says otherwise, and for the Docker fallback
+_DEFAULT_AUDIO_FORMAT = {"rate": 22050, "width": 2, "channels": 1}  # Default for most Piper models
+
+# Persistent piper process for synthesizing directly in the Docker container
+_DOCKER_PIPER_COMMAND = (
+    "docker", "exec", "-i", "piper-tts",
+    "/usr/share/piper/piper",
+    "--model", "/config/models/tts/en_US-joe-medium.onnx",
+    "--output_raw"
+)
+_DOCKER_FIRST_AUDIO_TIMEOUT = 30  # Seconds to wait for piper to start producing audio
+_DOCKER_IDLE_TIMEOUT = 0.5  # Seconds of silence that end an utterance
+_DOCKER_DRAIN_TIMEOUT = 0.05  # Seconds to wait for trailing audio once piper reports a line done
+_DOCKER_LINE_DONE = b"Real-time factor"  # Logged by piper after writing a line's audio
+
+# Header line of an audio-chunk event, as written by the wyoming package. These are
+# matched without a JSON parse; their data only repeats the format from audio-start
+_AUDIO_CHUNK_HEADER = re.compile(
+    rb'\{"type": ?"audio-chunk"(?:, ?"version": ?"[^"]*")?'
+    rb', ?"data_length": ?(\d+), ?"payload_length": ?(\d+)\}'
+)
+_AUDIO_CHUNK_EVENT = {"type": "audio-chunk"}
+
+# Base64 audio from older Wyoming servers is decoded once this much has been received
+_B64_BATCH_SIZE = 64 * 1024
+
+# Write buffer of a streamed WAV file; audio chunks are small, so this coalesces
+# many of them into each write call
+_WAV_WRITE_BUFFER = 256 * 1024
+
+
+@functools.lru_cache(maxsize=128)
+def _default_output_file(prefix):
+    """Get the default output path for text starting with prefix (its first 30 chars)."""
+    return os.path.join("output", f"{safe_text(prefix)}.wav")
+
+
+def _warn_debug(debug):
+    """Warn callers still passing the debug flag, which no longer does anything."""
+    if debug:
+        warnings.warn(
+            'debug is deprecated and ignored; enable DEBUG on the "PiperWyoming" logger instead',
+            DeprecationWarning, stacklevel=3
+        )
+
+
+class _WavWriter:
+    """
+    Writes raw PCM straight to a WAV file as it arrives.
+    
+    A placeholder header is written first and filled in with the final sizes on close.
+    """
+    
+    def __init__(self, output_file, audio_format):
+        self._channels = audio_format["channels"]
+        self._width = audio_format["width"]
+        self._rate = audio_format["rate"]
+        self._size = 0
+        self._file = open(output_file, "wb", buffering=_WAV_WRITE_BUFFER)
+        self._file.write(bytes(WAV_HEADER_SIZE))
+    
+    def write(self, audio):
+        """Append raw PCM audio."""
+        self._size += self._file.write(audio)
+    
+    def close(self):
+        """Fill in the header and close the file."""
+        self._file.seek(0)
+        self._file.write(wav_header(self._size, self._rate, self._width, self._channels))
+        self._file.close()
+
+
+class _AudioResponse:
+    """
+    Handles the events of one Wyoming synthesize response, writing its audio to a WAV file.
+    
+    The file is opened with the first audio, so a response without audio leaves no file behind.
+    """
+    
+    def __init__(self, output_file):
+        self.output_file = output_file
+        self.audio_format = dict(_DEFAULT_AUDIO_FORMAT)
+        self.error = None  # Text of the server's error event, if it sent one
+        self._wf = None
+        self._b64_parts = []  # Base64 audio from older servers, not decoded yet
+        self._b64_size = 0
+    
+    @property
+    def has_audio(self):
+        """Whether any audio was written to the file."""
+        return self._wf is not None
+    
+    def handle(self, event, payload):
+        """
+        Handle one event.
+        
+        Args:
+            event: The event header, with its extra data merged into "data"
+            payload: The event's payload bytes (PCM audio for audio-chunk events)
+            
+        Returns:
+            True once the response is over
+        """
+        event_type = event["type"]
+        
+        # Audio chunks are by far the most common event, so they're checked first
+        if event_type == "audio-chunk":
+            if self._wf is None:
+                self._wf = _WavWriter(self.output_file, self.audio_format)
+            self._wf.write(payload)
+        
+        elif event_type == "audio-start":
+            for key, value in event.get("data", {}).items():
+                if key in self.audio_format:
+                    self.audio_format[key] = value
+        
+        elif event_type == "audio":
+            # Older servers send base64-encoded audio inside the JSON.
+            # Parts are decoded in batches; a batch can only grow up to
+            # a part that ends in padding or isn't whole 4-char groups
+            logger.debug("Received audio data")
+            part = event.get("data", {}).get("audio", "")
+            if len(part) % 4 and self._b64_parts:
+                self._write_b64_audio()
+            self._b64_parts.append(part)
+            self._b64_size += len(part)
+            if self._b64_size >= _B64_BATCH_SIZE or part.endswith("=") or len(part) % 4:
+                self._write_b64_audio()
+        
+        elif event_type == "error":
+            # Don't leave a partial file behind
+            self._b64_parts.clear()
+            if self._wf is not None:
+                self._wf.close()
+                self._wf = None
+                os.remove(self.output_file)
+            self.error = event.get("data", {}).get("text", "Unknown error")
+            return True
+        
+        elif event_type in ("audio-stop", "end"):
+            logger.debug("End of audio stream")
+            return True
+        
+        return False
+    
+    def close(self):
+        """Write the base64 audio still batched up and finish the WAV file."""
+        if self._b64_parts:
+            self._write_b64_audio()
+        if self._wf is not None:
+            # Closing the writer fills in the sizes in the header
+            self._wf.close()
+    
+    def _write_b64_audio(self):
+        """Decode the batched base64 audio parts and write the audio to the WAV file."""
+        data = "".join(self._b64_parts)
+        self._b64_parts.clear()
+        self._b64_size = 0
+        try:
+            # Strict decoding is the fast path; only a batch with line breaks
+            # or other characters outside the alphabet needs them skipped
+            try:
+                audio_chunk = b64decode(data, validate=True)
+            except binascii.Error:
+                audio_chunk = b64decode(data, validate=False)
+        except Exception as e:
+            logger.debug("Error decoding audio: %s", e)
+            return
+        
+        if audio_chunk:
+            if self._wf is None:
+                self._wf = _WavWriter(self.output_file, self.audio_format)
+            self._wf.write(audio_chunk)
+
+
 class PiperWyomingClient:
-    """Client for communicating with the Wyoming Piper TTS server."""
+    """
+    Client for communicating with the Wyoming Piper TTS server.
+    
+    Diagnostics are logged at DEBUG level on the "PiperWyoming" logger.
+    """
     
-    def __init__(self, host="localhost", port=10200):
+    def __init__(self, host="localhost", port=10200, unix_path=None):
         """
         Initialize the Wyoming client.
         
         Args:
             host: Hostname or IP address of the Wyoming server
             port: Port number of the Wyoming server
+            unix_path: Path of the server's Unix socket; if given, it is used
+                instead of host and port, skipping the TCP stack for a local server
         """
         self.host = host
         self.port = port
+        self.unix_path = unix_path
+        self._address = unix_path if unix_path else (host, port)
+        self._server_name = unix_path if unix_path else f"{host}:{port}"
+        
+        # Output directories already created
+        self._dirs_created = set()
+        
+        # Connections kept open between requests, one per concurrent caller
+        self._sock_pool = queue.SimpleQueue()
+        
+        # Persistent piper process for the Docker fallback, started on first use
+        self._docker_process = None
+        self._docker_output = None
+        self._docker_stderr = deque()
+        self._docker_lock = threading.Lock()
         
     def synthesize(self, text, output_file=None, speaker_id=0, debug=False):
         """
@@ -36,238 +271,645 @@ class PiperWyomingClient:
             text: The text to synthesize
             output_file: Path to the output WAV file (or None to generate a path)
             speaker_id: Speaker ID for multi-speaker models (default: 0)
-            debug: Enable debug logging
+            debug: Deprecated and ignored; enable DEBUG on the "PiperWyoming" logger instead
             
         Returns:
             A tuple of (success, message)
         """
+        _warn_debug(debug)
         if not text:
             return False, "Empty text provided"
         
-        # Generate an output filename if not provided
-        if output_file is None:
-            # Create a safe filename from the text (first 30 chars)
-            safe_text = "".join([c if c.isalnum() else "_" for c in text[:30]])
-            output_file = os.path.join("output", f"{safe_text}.wav")
-            
-        # Create output directory if it doesn't exist
-        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+        output_file = self._prepare_output_file(text, output_file)
         
-        # Try direct Docker approach for Windows to avoid encoding issues
-        if sys.platform == "win32":
-            return self._synthesize_via_docker(text, output_file, speaker_id, debug)
-        else:
-            # On Linux/macOS, try the Wyoming protocol first
-            success, message = self._synthesize_via_wyoming(text, output_file, speaker_id, debug)
-            if not success:
-                # Fall back to direct Docker approach if Wyoming fails
-                return self._synthesize_via_docker(text, output_file, speaker_id, debug)
-            return success, message
+        # Try the Wyoming protocol first; requests and audio are sent as UTF-8 and
+        # raw bytes, so this works the same on every platform
+        success, message = self._synthesize_via_wyoming(text, output_file, speaker_id)
+        if not success:
+            # Fall back to direct Docker approach if Wyoming fails
+            return self._synthesize_via_docker(text, output_file, speaker_id)
+        return success, message
     
-    def _synthesize_via_wyoming(self, text, output_file, speaker_id=0, debug=False):
-        """Use Wyoming protocol to communicate with Piper"""
-        try:
-            # Connect to the Wyoming server
-            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            s.settimeout(10)  # Set timeout to 10 seconds
+    def synthesize_many(self, texts, output_files=None, speaker_id=0, workers=4, debug=False):
+        """
+        Synthesize several texts at once, each on its own pooled connection.
+        
+        Args:
+            texts: The texts to synthesize
+            output_files: Paths to the output WAV files, one per text (or None to generate paths)
+            speaker_id: Speaker ID for multi-speaker models (default: 0)
+            workers: Number of requests to run at the same time
+            debug: Deprecated and ignored; enable DEBUG on the "PiperWyoming" logger instead
             
-            if debug:
-                print(f"Connecting to {self.host}:{self.port}...")
-                
-            s.connect((self.host, self.port))
+        Returns:
+            A list of (success, message) tuples, in the order of texts
+            
+        Raises:
+            ValueError: If output_files doesn't have one path per text
+        """
+        _warn_debug(debug)
+        texts = list(texts)
+        if output_files is None:
+            output_files = [None] * len(texts)
+        else:
+            output_files = list(output_files)
+            if len(output_files) != len(texts):
+                raise ValueError(
+                    f"Got {len(output_files)} output files for {len(texts)} texts"
+                )
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(
+                lambda text, output_file: self.synthesize(text, output_file, speaker_id),
+                texts, output_files
+            ))
+    
+    async def synthesize_async(self, text, output_file=None, speaker_id=0, debug=False):
+        """
+        Synthesize speech from text and save to an output file, without blocking the event loop.
+        
+        Several requests can run at once, e.g. with asyncio.gather, each on its own connection.
+        
+        Args:
+            text: The text to synthesize
+            output_file: Path to the output WAV file (or None to generate a path)
+            speaker_id: Speaker ID for multi-speaker models (default: 0)
+            debug: Deprecated and ignored; enable DEBUG on the "PiperWyoming" logger instead
             
-            # Send synthesis request
-            request = {
-                "type": "synthesize",
-                "data": {
-                    "text": text,
-                    "speaker": str(speaker_id)
-                }
-            }
+        Returns:
+            A tuple of (success, message)
+        """
+        _warn_debug(debug)
+        if not text:
+            return False, "Empty text provided"
+        
+        output_file = self._prepare_output_file(text, output_file)
+        
+        # The Docker fallback blocks, so it runs on the default executor
+        loop = asyncio.get_running_loop()
+        synthesize_via_docker = functools.partial(
+            self._synthesize_via_docker, text, output_file, speaker_id
+        )
+        
+        success, message = await self._synthesize_via_wyoming_async(text, output_file, speaker_id)
+        if not success:
+            # Fall back to direct Docker approach if Wyoming fails
+            return await loop.run_in_executor(None, synthesize_via_docker)
+        return success, message
+    
+    async def _synthesize_via_wyoming_async(self, text, output_file, speaker_id=0):
+        """Use Wyoming protocol to communicate with Piper over asyncio streams"""
+        writer = None
+        try:
+            logger.debug("Connecting to %s...", self._server_name)
             
-            if debug:
-                print(f"Sending request: {json.dumps(request)}")
+            s = self._new_socket()
+            try:
+                s.setblocking(False)
+                await asyncio.wait_for(
+                    asyncio.get_running_loop().sock_connect(s, self._address), _IO_TIMEOUT
+                )
+                self._enable_quickack(s)
                 
-            # Add newline to separate JSON objects
-            s.sendall(json.dumps(request).encode('utf-8') + b"\n")
+                # Older servers put base64 audio in the header line, so allow long lines
+                reader, writer = await asyncio.open_connection(sock=s, limit=1 << 20)
+            except BaseException:
+                s.close()
+                raise
             
-            # New approach: Read the raw response in binary mode
-            audio_data = bytearray()
+            writer.write(_REQUEST_TEMPLATE % (_dumps(text), _dumps(str(speaker_id))))
+            await writer.drain()
             
-            # We'll use a simple state machine to parse the response
-            # State 0: Looking for JSON response
-            # State 1: Collecting audio data
-            state = 0
-            buffer = bytearray()
+            # Each Wyoming event is a JSON header line, optionally followed by
+            # data_length bytes of extra JSON data and payload_length bytes of payload
+            audio = _AudioResponse(output_file)
             
             try:
                 while True:
-                    chunk = s.recv(4096)
-                    if not chunk:
-                        if debug:
-                            print("Connection closed by server")
+                    try:
+                        line = await asyncio.wait_for(reader.readuntil(b"\n"), _IO_TIMEOUT)
+                    except asyncio.IncompleteReadError:
+                        logger.debug("Connection closed by server")
                         break
                     
-                    if debug:
-                        print(f"Received {len(chunk)} bytes")
+                    audio_chunk_header = _AUDIO_CHUNK_HEADER.fullmatch(line, 0, len(line) - 1)
+                    if audio_chunk_header is not None:
+                        event = _AUDIO_CHUNK_EVENT
+                        data_length = int(audio_chunk_header[1])
+                        payload_length = int(audio_chunk_header[2])
+                    else:
+                        try:
+                            event = _loads(line)
+                        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+                            logger.debug("JSON error (trying to continue): %s", e)
+                            continue
+                        data_length = event.get("data_length") or 0
+                        payload_length = event.get("payload_length") or 0
                     
-                    # Look for JSON responses (they should be UTF-8 encoded and end with newline)
-                    if state == 0:
-                        buffer.extend(chunk)
-                        newline_pos = buffer.find(b'\n')
-                        
-                        while newline_pos >= 0:
-                            line = buffer[:newline_pos]
-                            buffer = buffer[newline_pos + 1:]
-                            
-                            try:
-                                # Decode line as UTF-8 (safer than default encoding)
-                                json_str = line.decode('utf-8')
-                                if debug:
-                                    print(f"Processing JSON: {json_str[:100]}...")
-                                
-                                response = json.loads(json_str)
-                                
-                                if response["type"] == "audio":
-                                    if debug:
-                                        print("Received audio data")
-                                    try:
-                                        # Get audio data from base64
-                                        audio_chunk = base64.b64decode(response["data"]["audio"])
-                                        audio_data.extend(audio_chunk)
-                                    except Exception as e:
-                                        if debug:
-                                            print(f"Error decoding audio: {e}")
-                                
-                                elif response["type"] == "error":
-                                    return False, f"Server error: {response['data'].get('text', 'Unknown error')}"
-                                
-                                elif response["type"] == "end":
-                                    if debug:
-                                        print("End of audio stream")
-                                    state = 1  # Done processing
-                                    break
-                                    
-                            except UnicodeDecodeError as e:
-                                if debug:
-                                    print(f"Unicode error (trying to continue): {e}")
-                                # Skip this chunk and continue
-                                pass
-                            except json.JSONDecodeError as e:
-                                if debug:
-                                    print(f"JSON error (trying to continue): {e}")
-                                # Skip this chunk and continue
-                                pass
-                            
-                            # Look for next newline
-                            newline_pos = buffer.find(b'\n')
+                    if data_length:
+                        data = await asyncio.wait_for(reader.readexactly(data_length), _IO_TIMEOUT)
+                        if event is not _AUDIO_CHUNK_EVENT:
+                            event.setdefault("data", {}).update(_loads(data))
+                    payload = b""
+                    if payload_length:
+                        payload = await asyncio.wait_for(reader.readexactly(payload_length), _IO_TIMEOUT)
                     
-                    # If we're done processing JSON or buffer is too large, break
-                    if state == 1 or len(buffer) > 100000:
+                    if audio.handle(event, payload):
                         break
                 
-            except socket.timeout:
-                if debug:
-                    print("Socket timeout while reading")
+            except (asyncio.TimeoutError, asyncio.IncompleteReadError):
+                logger.debug("Socket timeout or connection closed while reading")
+            finally:
+                audio.close()
             
-            s.close()
+            if audio.error is not None:
+                return False, f"Server error: {audio.error}"
             
             # If we didn't get any audio data, return error
-            if not audio_data:
+            if not audio.has_audio:
                 return False, "No audio data received from server"
             
-            # Save audio to WAV file
-            with wave.open(output_file, "wb") as wf:
-                wf.setnchannels(1)
-                wf.setsampwidth(2)  # 16-bit audio
-                wf.setframerate(22050)  # Default for most Piper models
-                wf.writeframes(audio_data)
-            
             return True, f"Speech generated successfully and saved to {output_file}"
             
         except ConnectionRefusedError:
-            return False, f"Could not connect to Wyoming server at {self.host}:{self.port}"
-        except socket.timeout:
-            return False, f"Connection to {self.host}:{self.port} timed out"
+            return False, f"Could not connect to Wyoming server at {self._server_name}"
+        except asyncio.TimeoutError:
+            return False, f"Connection to {self._server_name} timed out"
         except Exception as e:
             return False, f"Failed to synthesize via Wyoming: {str(e)}"
+        finally:
+            if writer is not None:
+                writer.close()
+    
+    def _prepare_output_file(self, text, output_file):
+        """
+        Get the output file path, generating one if needed, and create its directory.
+        
+        Args:
+            text: The text to synthesize
+            output_file: Path to the output WAV file, or None
+            
+        Returns:
+            The output file path
+        """
+        # Generate an output filename if not provided
+        if output_file is None:
+            # Create a safe filename from the text (first 30 chars)
+            output_file = _default_output_file(text[:30])
+        
+        # Create output directory if it doesn't exist, once per directory
+        directory = os.path.dirname(output_file)
+        if directory and directory not in self._dirs_created:
+            os.makedirs(directory, exist_ok=True)
+            self._dirs_created.add(directory)
+        return output_file
     
-    def _synthesize_via_docker(self, text, output_file, speaker_id=0, debug=False):
-        """Use direct Docker commands to generate speech"""
+    def _synthesize_via_wyoming(self, text, output_file, speaker_id=0):
+        """Use Wyoming protocol to communicate with Piper"""
+        s = None
         try:
-            if debug:
-                print("Using direct Docker approach...")
+            # Send synthesis request; only the text and speaker need encoding
+            request_bytes = _REQUEST_TEMPLATE % (_dumps(text), _dumps(str(speaker_id)))
             
-            # Clean the text for shell usage
-            clean_text = text.replace("'", "'\\''")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Sending request: %s", request_bytes.decode("utf-8").rstrip())
             
-            # Create a temporary file for the raw audio
-            temp_raw = os.path.join("output", "temp.raw")
+            # Reuse a connection kept from an earlier request, if any
+            try:
+                s = self._sock_pool.get_nowait()
+            except queue.Empty:
+                pass
+            result = None
+            if s is not None:
+                result = self._request_audio(s, request_bytes, output_file)
+                if result is None:
+                    # The server closed the idle connection; retry once on a new one
+                    logger.debug("Kept connection was closed, reconnecting...")
+                    s.close()
+            if result is None:
+                s = self._connect()
+                result = self._request_audio(s, request_bytes, output_file)
+                if result is None:
+                    return False, "Connection closed by server before responding"
             
-            # Run piper directly in the container
-            cmd = [
-                "docker", "exec", "piper-tts",
-                "sh", "-c", 
-                f"echo '{clean_text}' | "
-                f"/usr/share/piper/piper "
-                f"--model /config/models/tts/en_US-joe-medium.onnx "
-                f"--output_raw > /tmp/output.raw"
-            ]
+            success, message, reusable = result
+            if reusable:
+                self._sock_pool.put(s)
+                s = None
+            return success, message
             
-            if debug:
-                print(f"Running command: {' '.join(cmd)}")
+        except ConnectionRefusedError:
+            return False, f"Could not connect to Wyoming server at {self._server_name}"
+        except socket.timeout:
+            return False, f"Connection to {self._server_name} timed out"
+        except Exception as e:
+            return False, f"Failed to synthesize via Wyoming: {str(e)}"
+        finally:
+            if s is not None:
+                s.close()
+    
+    def _connect(self):
+        """
+        Connect to the Wyoming server.
+        
+        Returns:
+            The connected socket
+        """
+        s = self._new_socket()
+        s.settimeout(_IO_TIMEOUT)
+        
+        logger.debug("Connecting to %s...", self._server_name)
+        
+        try:
+            s.connect(self._address)
+        except OSError:
+            s.close()
+            raise
+        self._enable_quickack(s)
+        
+        # Requests wait for the socket with a selector instead of socket timeouts
+        s.setblocking(False)
+        return s
+    
+    def _new_socket(self):
+        """
+        Create a socket for the Wyoming server, tuned for the event stream.
+        
+        Returns:
+            The unconnected socket
+        """
+        if self.unix_path:
+            return socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        
+        # Small event headers are sent and acknowledged right away rather than
+        # batched, and the receive window fits whole audio bursts (set before
+        # connecting so the window scale is negotiated for it). Keepalives stop
+        # pooled connections from silently dying while idle
+        s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, _RCVBUF_SIZE)
+        return s
+    
+    @staticmethod
+    def _enable_quickack(s):
+        """Acknowledge received data right away on a connected TCP socket (Linux only)."""
+        if s.family == socket.AF_INET and hasattr(socket, "TCP_QUICKACK"):
+            s.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+    
+    def _request_audio(self, s, request_bytes, output_file):
+        """
+        Send a synthesis request over a connection and write the audio it returns.
+        
+        Args:
+            s: The connected socket
+            request_bytes: The encoded synthesize event
+            output_file: Path to the output WAV file
             
-            result = subprocess.run(cmd, capture_output=True, text=True)
+        Returns:
+            A tuple of (success, message, reusable), where reusable says whether the
+            connection can take another request, or None if the connection was closed
+            before the server responded
+        """
+        selector = selectors.DefaultSelector()
+        selector.register(s, selectors.EVENT_READ)
+        
+        # Read the response in binary mode. Each Wyoming event is a JSON header line,
+        # optionally followed by data_length bytes of extra JSON data and
+        # payload_length bytes of raw payload (PCM audio for audio-chunk events).
+        # Audio is written to the WAV file as it arrives
+        audio = _AudioResponse(output_file)
+        
+        # We'll use a simple state machine to parse the response
+        # State 0: Looking for JSON response
+        # State 1: Done processing
+        # State 2: Gave up on an event cut short
+        state = 0
+        # Data is received straight into a reusable buffer. buffer[pos:end] holds
+        # the bytes not parsed yet; they are only moved to the front when the
+        # buffer fills up
+        buffer = bytearray(65536)
+        view = memoryview(buffer)
+        pos = 0
+        end = 0
+        # Parsed header whose data and payload haven't all arrived yet
+        response = None
+        # Bytes after pos already searched for a newline, so a long header line
+        # arriving over many reads isn't scanned again from its start each time
+        scanned = 0
+        got_data = False
+        
+        # Per-read and per-event debug messages are skipped with one check per request
+        debug = logger.isEnabledFor(logging.DEBUG)
+        
+        # Bound methods used once or more per event, looked up once
+        handle_event = audio.handle
+        find = buffer.find
+        match_audio_chunk = _AUDIO_CHUNK_HEADER.fullmatch
+        select = selector.select
+        recv_into = s.recv_into
+        
+        try:
+            try:
+                self._send_all(s, request_bytes, selector)
+            except (BrokenPipeError, ConnectionResetError):
+                return None
             
-            if result.returncode != 0:
+            while state == 0:
+                if end == len(buffer):
+                    if pos:
+                        buffer[:end - pos] = buffer[pos:end]
+                        end -= pos
+                        pos = 0
+                    else:
+                        # A single header fills the buffer; make it bigger
+                        buffer = buffer + bytearray(len(buffer))
+                        view = memoryview(buffer)
+                        find = buffer.find
+                
+                # Read whatever the kernel already has, and only wait for the
+                # socket once it runs dry
+                try:
+                    received = recv_into(view[end:])
+                except BlockingIOError:
+                    if not select(_IO_TIMEOUT):
+                        logger.debug("Socket timeout while reading")
+                        break
+                    continue
+                except ConnectionResetError:
+                    received = 0
+                if not received:
+                    logger.debug("Connection closed by server")
+                    if not got_data:
+                        return None
+                    break
+                got_data = True
+                end += received
+                
                 if debug:
-                    print(f"Command failed: {result.stderr}")
-                return False, f"Direct command failed: {result.stderr}"
-            
-            # Copy the raw audio file from the container
-            cmd_copy = [
-                "docker", "cp", 
-                "piper-tts:/tmp/output.raw", 
-                temp_raw
-            ]
-            
-            if debug:
-                print(f"Copying file: {' '.join(cmd_copy)}")
+                    logger.debug("Received %d bytes", received)
+                
+                while True:
+                    if response is None:
+                        # Look for event headers (UTF-8 encoded JSON ending with a newline)
+                        newline_pos = find(b'\n', pos + scanned, end)
+                        if newline_pos < 0:
+                            scanned = end - pos
+                            break
+                        scanned = 0
+                        line = view[pos:newline_pos]
+                        pos = newline_pos + 1
+                        
+                        audio_chunk_header = match_audio_chunk(line)
+                        if audio_chunk_header is not None:
+                            response = _AUDIO_CHUNK_EVENT
+                            data_length = int(audio_chunk_header[1])
+                            body_length = data_length + int(audio_chunk_header[2])
+                            continue
+                        
+                        try:
+                            if debug:
+                                logger.debug("Processing JSON: %s...", bytes(line[:100]).decode("utf-8", "replace"))
+                            
+                            # Headers are UTF-8 JSON, parsed in place in the buffer
+                            response = _loads(line)
+                        except UnicodeDecodeError as e:
+                            logger.debug("Unicode error (trying to continue): %s", e)
+                            # Skip this line and continue
+                            continue
+                        except json.JSONDecodeError as e:
+                            logger.debug("JSON error (trying to continue): %s", e)
+                            # Skip this line and continue
+                            continue
+                        
+                        data_length = response.get("data_length") or 0
+                        body_length = data_length + (response.get("payload_length") or 0)
+                    
+                    # Wait for a body that fits in the buffer to arrive there, along
+                    # with the events after it, so each recv covers many events
+                    if end - pos < body_length <= len(buffer):
+                        break
+                    
+                    if end - pos >= body_length:
+                        body = view[pos:pos + body_length]
+                        pos += body_length
+                    else:
+                        # Too big for the buffer; receive the rest straight into place
+                        body = memoryview(bytearray(body_length))
+                        buffered = end - pos
+                        body[:buffered] = view[pos:end]
+                        pos = end
+                        if not self._recv_exact(s, body[buffered:], selector):
+                            logger.debug("Connection closed or timed out")
+                            state = 2  # The event can't be completed
+                            break
+                    
+                    if data_length and response is not _AUDIO_CHUNK_EVENT:
+                        response.setdefault("data", {}).update(_loads(body[:data_length]))
+                    event, response = response, None
+                    if handle_event(event, body[data_length:]):
+                        state = 1  # Done processing
+                        break
+                
+                # Start again from the front once everything is parsed. Otherwise move
+                # the unparsed tail forward once the cursor passes half the buffer, so
+                # the next recv has room for a large read instead of a few bytes
+                if pos == end:
+                    pos = end = 0
+                elif pos > 32768:
+                    buffer[:end - pos] = buffer[pos:end]
+                    end -= pos
+                    pos = 0
+                
+                # If the buffer is too large without a complete line, give up
+                if response is None and end - pos > 100000:
+                    break
             
-            result_copy = subprocess.run(cmd_copy, capture_output=True, text=True)
+        finally:
+            selector.close()
+            audio.close()
+        
+        if audio.error is not None:
+            return False, f"Server error: {audio.error}", False
+        
+        # If we didn't get any audio data, return error
+        if not audio.has_audio:
+            return False, "No audio data received from server", False
+        
+        # The connection can take another request if the response ended cleanly
+        reusable = state == 1 and pos == end
+        return True, f"Speech generated successfully and saved to {output_file}", reusable
+    
+    @staticmethod
+    def _send_all(s, data, selector):
+        """
+        Send all of data on a non-blocking socket.
+        
+        Args:
+            s: The connected socket
+            data: The bytes to send
+            selector: A selector with the socket registered for reading
+        """
+        view = memoryview(data)
+        while view:
+            try:
+                view = view[s.send(view):]
+            except BlockingIOError:
+                # The send buffer is full; wait until it drains
+                selector.modify(s, selectors.EVENT_WRITE)
+                ready = selector.select(_IO_TIMEOUT)
+                selector.modify(s, selectors.EVENT_READ)
+                if not ready:
+                    raise socket.timeout("timed out sending request")
+    
+    @staticmethod
+    def _recv_exact(s, view, selector):
+        """
+        Receive from a non-blocking socket until a memoryview is full.
+        
+        Args:
+            s: The connected socket
+            view: A writable memoryview to fill
+            selector: A selector with the socket registered for reading
             
-            if result_copy.returncode != 0:
-                if debug:
-                    print(f"Copy failed: {result_copy.stderr}")
-                return False, f"Failed to copy output: {result_copy.stderr}"
+        Returns:
+            False if the connection closed or timed out before the view was filled
+        """
+        while view:
+            # As in _request_audio, only wait once the kernel has nothing buffered
+            try:
+                received = s.recv_into(view)
+            except BlockingIOError:
+                if not selector.select(_IO_TIMEOUT):
+                    return False
+                continue
+            if not received:
+                return False
+            view = view[received:]
+        return True
+    
+    def _synthesize_via_docker(self, text, output_file, speaker_id=0):
+        """Use a persistent piper process in the Docker container to generate speech"""
+        try:
+            logger.debug("Using direct Docker approach...")
             
-            # Read the raw audio
-            if not os.path.exists(temp_raw):
-                return False, f"Raw audio file not created: {temp_raw}"
+            # One request at a time; the process's output has no request boundaries
+            with self._docker_lock:
+                process = self._get_docker_process()
+                output = self._docker_output
                 
-            with open(temp_raw, "rb") as f:
-                audio_data = f.read()
-            
-            if debug:
-                print(f"Read {len(audio_data)} bytes from raw file")
+                # Drop audio left over from a request that outlasted its idle timeout
+                while not output.empty():
+                    output.get_nowait()
                 
-            if not audio_data:
-                return False, "No audio data in raw file"
-            
-            # Save as WAV file
-            with wave.open(output_file, "wb") as wf:
-                wf.setnchannels(1)
-                wf.setsampwidth(2)  # 16-bit audio
-                wf.setframerate(22050)  # Default for most Piper models
-                wf.writeframes(audio_data)
+                # piper synthesizes each line read from stdin; keep the text to one
+                # line so its audio isn't cut off after the first. piper only splits
+                # on "\n", and replace returns text itself when there are none
+                process.stdin.write(text.replace("\n", " ").encode("utf-8"))
+                process.stdin.write(b"\n")
+                process.stdin.flush()
+                
+                # Stream the raw audio into the WAV file until piper reports the
+                # line done, or goes quiet if its log doesn't say so
+                wf = None
+                timeout = _DOCKER_FIRST_AUDIO_TIMEOUT
+                done = False
+                try:
+                    while True:
+                        try:
+                            chunk = output.get(timeout=timeout)
+                        except queue.Empty:
+                            break
+                        if chunk is None:
+                            # Its audio was written first; only pick up what's still in the pipe
+                            done = True
+                            timeout = _DOCKER_DRAIN_TIMEOUT
+                            continue
+                        if not chunk:
+                            break  # The process exited
+                        if wf is None:
+                            wf = _WavWriter(output_file, _DEFAULT_AUDIO_FORMAT)
+                        wf.write(chunk)
+                        if not done:
+                            timeout = _DOCKER_IDLE_TIMEOUT
+                finally:
+                    if wf is not None:
+                        wf.close()
             
-            # Clean up temp file
-            try:
-                os.remove(temp_raw)
-            except:
-                pass
+            if wf is None:
+                stderr = b"".join(self._docker_stderr).decode("utf-8", "replace")
+                logger.debug("Command failed: %s", stderr)
+                return False, f"Direct command failed: {stderr or 'no audio data received'}"
                 
             return True, f"Speech generated successfully and saved to {output_file}"
             
         except Exception as e:
             return False, f"Failed to synthesize via Docker: {str(e)}"
+    
+    def _get_docker_process(self):
+        """
+        Get the persistent piper process in the Docker container, starting it if needed.
+        
+        Returns:
+            The running process
+        """
+        if self._docker_process is None or self._docker_process.poll() is not None:
+            logger.debug("Running command: %s", " ".join(_DOCKER_PIPER_COMMAND))
+            
+            process = subprocess.Popen(
+                _DOCKER_PIPER_COMMAND,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE
+            )
+            self._docker_process = process
+            self._docker_output = queue.Queue()
+            self._docker_stderr = deque(maxlen=20)
+            threading.Thread(
+                target=self._pump_output, args=(process, self._docker_output), daemon=True
+            ).start()
+            threading.Thread(
+                target=self._drain_stderr,
+                args=(process, self._docker_stderr, self._docker_output),
+                daemon=True
+            ).start()
+        return self._docker_process
+    
+    @staticmethod
+    def _pump_output(process, output):
+        """Move a piper process's raw audio into a queue, then b"" once it exits."""
+        for chunk in iter(lambda: process.stdout.read1(65536), b""):
+            output.put(chunk)
+        # Reap the process first so the next request sees it has exited
+        process.wait()
+        output.put(b"")
+    
+    @staticmethod
+    def _drain_stderr(process, tail, output):
+        """
+        Read a piper process's stderr until it exits, keeping the last lines
+        and queueing None each time piper reports a line synthesized.
+        """
+        for line in process.stderr:
+            if _DOCKER_LINE_DONE in line:
+                output.put(None)
+            tail.append(line)
+    
+    def close(self):
+        """Close the kept Wyoming connections and the persistent piper process in the Docker container."""
+        while True:
+            try:
+                self._sock_pool.get_nowait().close()
+            except queue.Empty:
+                break
+        
+        with self._docker_lock:
+            process, self._docker_process = self._docker_process, None
+        if process is not None and process.poll() is None:
+            process.stdin.close()
+            process.terminate()
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
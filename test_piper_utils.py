@@ -0,0 +1,86 @@
+"""
+Unit tests for the piper_utils helpers that need neither piper nor Qt.
+
+Run with: python -m unittest test_piper_utils
+"""
+import json
+import os
+import tempfile
+import unittest
+
+from piper_utils import _MAX_CHUNK_CHARS, PiperTTS, _split_sentences
+
+
+class SplitSentencesTest(unittest.TestCase):
+    """Tests for _split_sentences."""
+    
+    def test_short_text_is_kept_whole(self):
+        text = "Dr. Smith went to Washington. He met Mr. J. Jones there!"
+        self.assertEqual(_split_sentences(text), [text])
+    
+    def test_whitespace_is_stripped(self):
+        self.assertEqual(_split_sentences("  Hello world.\n"), ["Hello world."])
+        self.assertEqual(_split_sentences("   "), [])
+    
+    def test_long_text_is_cut_at_sentence_ends(self):
+        sentence = "This sentence is exactly fifty characters long ok."
+        chunks = _split_sentences(" ".join([sentence] * 10))
+        # Three sentences and their spaces fit in a chunk, four don't
+        self.assertEqual(chunks, [" ".join([sentence] * 3)] * 3 + [sentence])
+    
+    def test_long_text_is_not_cut_after_abbreviations(self):
+        # The only period that fits in the first chunk is an abbreviation's
+        text = "word " * 38 + "Dr. Smith " + "and more words " * 10
+        chunks = _split_sentences(text)
+        for chunk in chunks:
+            self.assertLessEqual(len(chunk), _MAX_CHUNK_CHARS)
+            self.assertFalse(chunk.endswith("Dr."))
+        self.assertIn("Dr. Smith", chunks[0])
+        self.assertEqual(" ".join(chunks), text.strip())
+    
+    def test_long_text_is_not_cut_after_initials(self):
+        text = "word " * 38 + "J. Jones " + "and more words " * 10
+        self.assertIn("J. Jones", _split_sentences(text)[0])
+    
+    def test_long_text_without_spaces_is_cut_at_the_limit(self):
+        text = "x" * (2 * _MAX_CHUNK_CHARS + 50)
+        self.assertEqual(
+            _split_sentences(text),
+            ["x" * _MAX_CHUNK_CHARS, "x" * _MAX_CHUNK_CHARS, "x" * 50]
+        )
+
+
+class ProcessRequestTest(unittest.TestCase):
+    """Tests for PiperTTS.process_request."""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        for model_name, num_speakers in (("single", 1), ("multi", 4)):
+            model_path = os.path.join(self.tmp.name, f"{model_name}.onnx")
+            open(model_path, "wb").close()
+            with open(f"{model_path}.json", "w", encoding="utf-8") as f:
+                json.dump({"num_speakers": num_speakers}, f)
+        self.piper = PiperTTS(models_dir=self.tmp.name, piper_executable="piper")
+    
+    def tearDown(self):
+        self.piper.close()
+        self.tmp.cleanup()
+    
+    def request(self, model_name, speaker_id=None):
+        line = self.piper.process_request("Hello.", model_name, "out.wav", speaker_id)
+        self.assertTrue(line.endswith(b"\n"))
+        return json.loads(line)
+    
+    def test_single_speaker_model_has_no_default_speaker(self):
+        self.assertEqual(self.request("single"), {"text": "Hello.", "output_file": "out.wav"})
+    
+    def test_multi_speaker_model_defaults_to_first_speaker(self):
+        self.assertEqual(self.request("multi")["speaker_id"], 0)
+    
+    def test_requested_speaker_is_kept(self):
+        self.assertEqual(self.request("multi", 2)["speaker_id"], 2)
+        self.assertEqual(self.request("single", 0)["speaker_id"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+"""
+Unit tests for the shared WAV header packing.
+
+Run with: python -m unittest test_wavfile
+"""
+import io
+import unittest
+import wave
+
+from wavfile import WAV_HEADER_SIZE, wav_header
+
+
+def _wave_module_file(audio, rate, width, channels):
+    """The WAV file the standard library's wave module writes for audio."""
+    output = io.BytesIO()
+    with wave.open(output, "wb") as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(width)
+        wf.setframerate(rate)
+        wf.writeframes(audio)
+    return output.getvalue()
+
+
+class WavHeaderTest(unittest.TestCase):
+    """Tests for wav_header."""
+
+    def test_header_size(self):
+        self.assertEqual(WAV_HEADER_SIZE, 44)
+        self.assertEqual(len(wav_header(0, 22050)), WAV_HEADER_SIZE)
+
+    def test_header_reads_back(self):
+        audio = bytes(range(200)) * 3
+        with wave.open(io.BytesIO(wav_header(len(audio), 22050) + audio), "rb") as wf:
+            self.assertEqual(wf.getnchannels(), 1)
+            self.assertEqual(wf.getsampwidth(), 2)
+            self.assertEqual(wf.getframerate(), 22050)
+            self.assertEqual(wf.readframes(wf.getnframes()), audio)
+
+    def test_header_matches_wave_module(self):
+        audio = bytes(range(240)) * 2
+        for width, channels in ((2, 1), (1, 1), (2, 2), (4, 2)):
+            with self.subTest(width=width, channels=channels):
+                self.assertEqual(
+                    wav_header(len(audio), 16000, width, channels) + audio,
+                    _wave_module_file(audio, 16000, width, channels)
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,10 +5,15 @@ import os
 import sys
 import subprocess
 import time
+import logging
 from piper_wyoming import PiperWyomingClient
 
 def main():
     """Main entry point for the test script."""
+    # Show the client's debug messages
+    logging.basicConfig(level=logging.INFO, format='%(name)s - %(levelname)s - %(message)s')
+    logging.getLogger("PiperWyoming").setLevel(logging.DEBUG)
+    
     # Create output directory if it doesn't exist
     os.makedirs("output", exist_ok=True)
     
@@ -73,7 +78,8 @@ def main():
     print("\nAttempting to synthesize speech with debug info...")
     # Synthesize speech with debug info
     output_file = os.path.join("output", "docker_test.wav")
-    success, message = client.synthesize(test_text, output_file, debug=True)
+    success, message = client.synthesize(test_text, output_file)
+    client.close()
     
     # Print the result
     if success:
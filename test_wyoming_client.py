@@ -0,0 +1,257 @@
+"""
+Unit tests for the Wyoming client's event reading, against a loopback server.
+
+Run with: python -m unittest test_wyoming_client
+"""
+import asyncio
+import json
+import logging
+import os
+import socketserver
+import tempfile
+import threading
+import unittest
+import wave
+from base64 import b64encode
+
+from piper_wyoming import PiperWyomingClient
+
+# Eight seconds of 16-bit mono audio at 16 kHz, larger than the client's 64 KiB read buffer
+BIG_AUDIO = bytes(range(256)) * 1000
+SMALL_AUDIO = b"\x01\x02" * 2000
+
+
+def _event(event_type, data=None, payload=b""):
+    """Encode a Wyoming event, sending its data as extra JSON after the header."""
+    header = {"type": event_type}
+    data_bytes = json.dumps(data).encode("utf-8") if data else b""
+    if data_bytes:
+        header["data_length"] = len(data_bytes)
+    if payload:
+        header["payload_length"] = len(payload)
+    return json.dumps(header).encode("utf-8") + b"\n" + data_bytes + payload
+
+
+def _binary_response(audio, rate=16000, chunk_size=4096):
+    """The events of a response with the audio in binary audio-chunk payloads."""
+    audio_format = {"rate": rate, "width": 2, "channels": 1}
+    events = [_event("audio-start", audio_format)]
+    for i in range(0, len(audio), chunk_size):
+        events.append(_event("audio-chunk", audio_format, audio[i:i + chunk_size]))
+    events.append(_event("audio-stop"))
+    return b"".join(events)
+
+
+def _legacy_response(audio):
+    """The events of a response from an older server, with base64 audio in the JSON."""
+    encoded = b64encode(audio).decode("ascii")
+    # Split on 4-char groups, so only the last part carries padding
+    parts = [encoded[:400], encoded[400:1200], encoded[1200:]]
+    events = [_event("audio", {"audio": part}) for part in parts]
+    events.append(_event("end"))
+    return b"".join(events)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Answers synthesize requests; the text picks the response."""
+    
+    def handle(self):
+        self.server.connections += 1
+        for line in self.rfile:
+            request = json.loads(line)
+            # The client sends its data inline, with no extra data or payload
+            text = request["data"]["text"]
+            if text == "binary":
+                response = _binary_response(SMALL_AUDIO)
+            elif text == "big":
+                response = _binary_response(BIG_AUDIO, chunk_size=len(BIG_AUDIO))
+            elif text == "legacy":
+                response = _legacy_response(SMALL_AUDIO)
+            else:
+                # Send the partial audio first so the client has a file to clean up
+                response = _binary_response(SMALL_AUDIO[:1000])[:-len(_event("audio-stop"))]
+                response += _event("error", {"text": "boom"})
+            self.wfile.write(response)
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.connections = 0
+
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+    
+    def __init__(self, path):
+        super().__init__(path, _Handler)
+        self.connections = 0
+
+
+class WyomingClientTest(unittest.TestCase):
+    """Tests for PiperWyomingClient's Wyoming protocol path."""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.server = _Server()
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+    
+    def setUp(self):
+        self.server.connections = 0
+        self.client = PiperWyomingClient(host="127.0.0.1", port=self.server.server_address[1])
+        self.tmp = tempfile.TemporaryDirectory()
+    
+    def tearDown(self):
+        self.client.close()
+        self.tmp.cleanup()
+    
+    def synthesize(self, text, name="out.wav"):
+        """Synthesize over Wyoming only, without the Docker fallback."""
+        output_file = os.path.join(self.tmp.name, name)
+        success, message = self.client._synthesize_via_wyoming(text, output_file)
+        return success, message, output_file
+    
+    def assertWav(self, output_file, audio, rate):
+        with wave.open(output_file, "rb") as wf:
+            self.assertEqual(wf.getframerate(), rate)
+            self.assertEqual(wf.getsampwidth(), 2)
+            self.assertEqual(wf.getnchannels(), 1)
+            self.assertEqual(wf.readframes(wf.getnframes()), audio)
+    
+    def test_binary_audio_chunks(self):
+        success, message, output_file = self.synthesize("binary")
+        self.assertTrue(success, message)
+        self.assertWav(output_file, SMALL_AUDIO, 16000)
+    
+    def test_payload_larger_than_buffer(self):
+        success, message, output_file = self.synthesize("big")
+        self.assertTrue(success, message)
+        self.assertWav(output_file, BIG_AUDIO, 16000)
+    
+    def test_legacy_base64_audio(self):
+        success, message, output_file = self.synthesize("legacy")
+        self.assertTrue(success, message)
+        # Legacy servers don't send audio-start, so the default format is used
+        self.assertWav(output_file, SMALL_AUDIO, 22050)
+    
+    def test_server_error(self):
+        success, message, output_file = self.synthesize("error")
+        self.assertFalse(success)
+        self.assertEqual(message, "Server error: boom")
+        self.assertFalse(os.path.exists(output_file))
+    
+    def test_kept_connection_is_reused(self):
+        for i, text in enumerate(("binary", "big", "legacy", "binary")):
+            success, message, _ = self.synthesize(text, f"out{i}.wav")
+            self.assertTrue(success, message)
+        self.assertEqual(self.server.connections, 1)
+    
+    def test_new_connection_after_error(self):
+        self.assertFalse(self.synthesize("error")[0])
+        success, message, output_file = self.synthesize("binary")
+        self.assertTrue(success, message)
+        self.assertWav(output_file, SMALL_AUDIO, 16000)
+        self.assertEqual(self.server.connections, 2)
+    
+    def test_synthesize_many(self):
+        texts = ["binary", "big", "legacy"]
+        output_files = [os.path.join(self.tmp.name, f"many{i}.wav") for i in range(len(texts))]
+        results = self.client.synthesize_many(texts, output_files, workers=2)
+        
+        # One result per text, in the order of texts
+        self.assertEqual(len(results), len(texts))
+        for (success, message), output_file in zip(results, output_files):
+            self.assertTrue(success, message)
+            self.assertTrue(message.endswith(output_file))
+        self.assertWav(output_files[0], SMALL_AUDIO, 16000)
+        self.assertWav(output_files[1], BIG_AUDIO, 16000)
+        self.assertWav(output_files[2], SMALL_AUDIO, 22050)
+    
+    def test_synthesize_many_generates_paths(self):
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        try:
+            results = self.client.synthesize_many(["binary", "legacy"])
+        finally:
+            os.chdir(cwd)
+        
+        self.assertEqual(len(results), 2)
+        for (success, message), text in zip(results, ("binary", "legacy")):
+            self.assertTrue(success, message)
+            self.assertTrue(message.endswith(os.path.join("output", f"{text}.wav")))
+            self.assertTrue(os.path.exists(os.path.join(self.tmp.name, "output", f"{text}.wav")))
+    
+    def test_synthesize_many_length_mismatch(self):
+        with self.assertRaises(ValueError):
+            self.client.synthesize_many(["binary", "big"], [os.path.join(self.tmp.name, "a.wav")])
+        self.assertEqual(self.server.connections, 0)
+    
+    def test_synthesize_async(self):
+        texts = ["binary", "big", "legacy"]
+        output_files = [os.path.join(self.tmp.name, f"async{i}.wav") for i in range(len(texts))]
+        
+        async def run():
+            return await asyncio.gather(*(
+                self.client.synthesize_async(text, output_file)
+                for text, output_file in zip(texts, output_files)
+            ))
+        
+        for success, message in asyncio.run(run()):
+            self.assertTrue(success, message)
+        self.assertWav(output_files[0], SMALL_AUDIO, 16000)
+        self.assertWav(output_files[1], BIG_AUDIO, 16000)
+        self.assertWav(output_files[2], SMALL_AUDIO, 22050)
+    
+    def test_synthesize_async_server_error(self):
+        output_file = os.path.join(self.tmp.name, "error.wav")
+        success, message = asyncio.run(self.client._synthesize_via_wyoming_async("error", output_file))
+        self.assertFalse(success)
+        self.assertEqual(message, "Server error: boom")
+        self.assertFalse(os.path.exists(output_file))
+    
+    def test_debug_flag_is_deprecated(self):
+        logger = logging.getLogger("PiperWyoming")
+        level = logger.level
+        output_file = os.path.join(self.tmp.name, "debug.wav")
+        with self.assertWarns(DeprecationWarning):
+            success, message = self.client.synthesize("binary", output_file, debug=True)
+        self.assertTrue(success, message)
+        # The flag doesn't change the logger's level for later calls
+        self.assertEqual(logger.level, level)
+
+
+@unittest.skipUnless(hasattr(socketserver, "ThreadingUnixStreamServer"), "Unix sockets not supported")
+class WyomingClientUnixSocketTest(unittest.TestCase):
+    """Tests for PiperWyomingClient connecting over a Unix socket."""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.server = _UnixServer(os.path.join(self.tmp.name, "wyoming.sock"))
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = PiperWyomingClient(unix_path=self.server.server_address)
+    
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+    
+    def test_unix_socket(self):
+        for i, text in enumerate(("binary", "big")):
+            output_file = os.path.join(self.tmp.name, f"out{i}.wav")
+            success, message = self.client._synthesize_via_wyoming(text, output_file)
+            self.assertTrue(success, message)
+            self.assertTrue(os.path.getsize(output_file) > 44)
+        self.assertEqual(self.server.connections, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,347 @@
+"""
+Shared PyQt5 window for the Piper TTS test applications.
+
+Subclasses provide the list of models and a synthesis function per model.
+"""
+import os
+import sys
+import logging
+import subprocess
+import threading
+from typing import Callable, List, Optional, Set, Tuple
+
+from PyQt5.QtWidgets import (
+    QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
+    QLabel, QTextEdit, QPushButton, QGroupBox,
+    QMessageBox, QProgressBar
+)
+from PyQt5.QtCore import QBuffer, QByteArray, QIODevice, QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt5.QtMultimedia import QMediaContent, QMediaPlayer
+
+from filenames import get_output_filename
+
+logger = logging.getLogger("PiperApp")
+
+# Open a file with the operating system's default application
+if sys.platform == "win32":
+    _open_file = os.startfile
+elif sys.platform == "darwin":  # macOS
+    def _open_file(path: str):
+        subprocess.run(["open", path], check=True)
+else:  # Linux and other Unix-like systems
+    def _open_file(path: str):
+        subprocess.run(["xdg-open", path], check=True)
+
+# Synthesizes (text, output_file, speaker_id) and returns (success, message)
+SynthesizeFn = Callable[[str, str, Optional[int]], Tuple[bool, str]]
+
+
+class SynthesisWorker(QRunnable):
+    """Thread pool task for running speech synthesis in the background."""
+    
+    class Signals(QObject):
+        """Signals emitted by a SynthesisWorker."""
+        update_progress = pyqtSignal(int)
+        synthesis_complete = pyqtSignal(str, bool, str)
+    
+    def __init__(self, synthesize_fn: SynthesizeFn, text: str, model_name: str,
+                 output_file: str, cancel: threading.Event,
+                 speaker_id: Optional[int] = None):
+        super().__init__()
+        self.signals = SynthesisWorker.Signals()
+        self.synthesize_fn = synthesize_fn
+        self.text = text
+        self.model_name = model_name
+        self.output_file = output_file
+        self.cancel = cancel
+        self.speaker_id = speaker_id
+    
+    def run(self):
+        """Run the synthesis process."""
+        if self.cancel.is_set():
+            return
+        self.signals.update_progress.emit(10)
+        success, message = self.synthesize_fn(self.text, self.output_file, self.speaker_id)
+        # Don't report results for a run that was stopped in the meantime
+        if self.cancel.is_set():
+            return
+        self.signals.update_progress.emit(100)
+        self.signals.synthesis_complete.emit(self.model_name, success, message)
+
+
+class BaseTTSApp(QMainWindow):
+    """
+    Main window with a text box, a progress bar and Play button per model,
+    and Synthesize All / Stop controls.
+    
+    Subclasses set model_names, implement synthesize_fn and call setup_ui.
+    """
+    
+    window_title = "Piper TTS"
+    default_text = ""
+    speaker_id: Optional[int] = None  # Speaker ID passed to every synthesis
+    
+    def __init__(self):
+        super().__init__()
+        self.model_names: List[str] = []
+        self.model_checkboxes = {}
+        self.workers = []  # Keep the signals of running workers alive
+        self._pending = set()  # Models still being synthesized
+        self._cancel = threading.Event()
+        self._ready: Set[str] = set()  # Output files synthesized successfully
+        
+        # In-memory audio playback
+        self._player = None
+        self._player_buffer = None
+        self._player_file = None
+    
+    def synthesize_fn(self, model_name: str) -> SynthesizeFn:
+        """
+        Get the synthesis function for a model.
+        
+        Args:
+            model_name: The voice model name
+        
+        Returns:
+            A function synthesizing (text, output_file, speaker_id)
+        """
+        raise NotImplementedError
+    
+    def setup_ui(self):
+        """Set up the user interface."""
+        self.setWindowTitle(self.window_title)
+        self.setGeometry(100, 100, 800, 600)
+        
+        # Main widget and layout
+        main_widget = QWidget()
+        main_layout = QVBoxLayout()
+        main_widget.setLayout(main_layout)
+        self.setCentralWidget(main_widget)
+        
+        # Input text group
+        input_group = QGroupBox("Input Text")
+        input_layout = QVBoxLayout()
+        
+        self.text_input = QTextEdit()
+        self.text_input.setPlaceholderText("Enter text to convert to speech...")
+        self.text_input.setText(self.default_text)
+        
+        input_layout.addWidget(self.text_input)
+        input_group.setLayout(input_layout)
+        main_layout.addWidget(input_group)
+        
+        # Models group
+        models_group = QGroupBox("Voice Models")
+        models_layout = QVBoxLayout()
+        
+        # List of selected models to process
+        self.model_checkboxes = {}
+        
+        for model_name in self.model_names:
+            model_layout = QHBoxLayout()
+            
+            # Model name label
+            model_label = QLabel(model_name)
+            model_layout.addWidget(model_label)
+            
+            # Progress bar
+            progress_bar = QProgressBar()
+            progress_bar.setRange(0, 100)
+            progress_bar.setValue(0)
+            model_layout.addWidget(progress_bar)
+            
+            # Play button
+            play_button = QPushButton("Play")
+            play_button.setEnabled(False)  # Disabled until synthesis is complete
+            play_button.clicked.connect(lambda checked, mn=model_name: self.play_audio(mn))
+            model_layout.addWidget(play_button)
+            
+            # Store the widgets for this model
+            self.model_checkboxes[model_name] = {
+                "progress_bar": progress_bar,
+                "play_button": play_button,
+                "output_file": None,  # Will be set after synthesis
+                "audio_bytes": None  # WAV data, if the synthesis kept it in memory
+            }
+            
+            models_layout.addLayout(model_layout)
+        
+        models_group.setLayout(models_layout)
+        main_layout.addWidget(models_group)
+        
+        # Control buttons
+        control_layout = QHBoxLayout()
+        
+        self.synthesize_button = QPushButton("Synthesize All")
+        self.synthesize_button.clicked.connect(self.synthesize_all)
+        control_layout.addWidget(self.synthesize_button)
+        
+        self.stop_button = QPushButton("Stop")
+        self.stop_button.clicked.connect(self.stop_all)
+        self.stop_button.setEnabled(False)
+        control_layout.addWidget(self.stop_button)
+        
+        main_layout.addLayout(control_layout)
+    
+    def synthesize_all(self):
+        """Synthesize speech for all selected models."""
+        # Get the input text
+        text = self.text_input.toPlainText().strip()
+        if not text:
+            QMessageBox.warning(self, "Empty Text", "Please enter some text to synthesize.")
+            return
+        
+        # Disable the synthesize button and enable the stop button
+        self.synthesize_button.setEnabled(False)
+        self.stop_button.setEnabled(True)
+        
+        # Reset progress bars and play buttons
+        for model_info in self.model_checkboxes.values():
+            model_info["progress_bar"].setValue(0)
+            model_info["play_button"].setEnabled(False)
+            self._ready.discard(model_info["output_file"])
+            model_info["output_file"] = None
+            model_info["audio_bytes"] = None
+        
+        # Start synthesis for each model
+        self._cancel = threading.Event()
+        self._pending = set(self.model_checkboxes)
+        self.workers = []
+        for model_name in self.model_checkboxes:
+            # Generate output filename
+            output_file = get_output_filename(text, model_name)
+            self.model_checkboxes[model_name]["output_file"] = output_file
+            
+            self.start_synthesis(text, model_name, output_file)
+    
+    def start_synthesis(self, text: str, model_name: str, output_file: str):
+        """
+        Start synthesis for one model on the shared thread pool.
+        
+        Args:
+            text: The input text
+            model_name: The voice model name
+            output_file: The path to save the output audio file
+        """
+        worker = SynthesisWorker(
+            self.synthesize_fn(model_name), text, model_name, output_file,
+            self._cancel, speaker_id=self.speaker_id
+        )
+        worker.signals.update_progress.connect(
+            lambda value, mn=model_name: self.update_progress(mn, value)
+        )
+        worker.signals.synthesis_complete.connect(self.synthesis_complete)
+        
+        self.workers.append(worker.signals)
+        QThreadPool.globalInstance().start(worker)
+    
+    def update_progress(self, model_name: str, value: int):
+        """Update the progress bar for a model."""
+        if model_name in self.model_checkboxes:
+            self.model_checkboxes[model_name]["progress_bar"].setValue(value)
+    
+    def synthesis_complete(self, model_name: str, success: bool, message: str):
+        """Handle completion of synthesis for a model."""
+        if model_name in self.model_checkboxes:
+            # Set progress to 100% and enable play button if successful
+            self.model_checkboxes[model_name]["progress_bar"].setValue(100)
+            self.model_checkboxes[model_name]["play_button"].setEnabled(success)
+            
+            # Log the result
+            if success:
+                self._ready.add(self.model_checkboxes[model_name]["output_file"])
+                logger.info(f"Synthesis completed for {model_name}: {message}")
+            else:
+                logger.error(f"Synthesis failed for {model_name}: {message}")
+                QMessageBox.warning(
+                    self, "Synthesis Failed",
+                    f"Failed to synthesize speech for {model_name}:\n{message}"
+                )
+        
+        # Check if all workers are done
+        self._pending.discard(model_name)
+        if not self._pending:
+            self.synthesis_complete_all()
+    
+    def synthesis_complete_all(self):
+        """Handle completion of all synthesis tasks."""
+        # Clean up the workers list
+        self.workers = []
+        
+        # Re-enable the synthesize button and disable the stop button
+        self.synthesize_button.setEnabled(True)
+        self.stop_button.setEnabled(False)
+        
+        # Show a completion message
+        QMessageBox.information(
+            self, "Synthesis Complete",
+            "Speech synthesis is complete for all models."
+        )
+    
+    def stop_all(self):
+        """Stop all running synthesis workers."""
+        # Workers can't be killed safely mid-synthesis; ask them to drop their results
+        self._cancel.set()
+        
+        # Clear the workers list
+        self.workers = []
+        self._pending = set()
+        
+        # Re-enable the synthesize button and disable the stop button
+        self.synthesize_button.setEnabled(True)
+        self.stop_button.setEnabled(False)
+        
+        # Show a message
+        QMessageBox.information(
+            self, "Synthesis Stopped",
+            "Speech synthesis has been stopped."
+        )
+    
+    def play_audio(self, model_name: str):
+        """Play the generated audio file for a model."""
+        output_file = self.model_checkboxes[model_name]["output_file"]
+        if output_file not in self._ready:
+            QMessageBox.warning(
+                self, "File Not Found",
+                f"Audio file for {model_name} not found."
+            )
+            return
+        
+        audio_bytes = self.model_checkboxes[model_name]["audio_bytes"]
+        if audio_bytes:
+            self._play_bytes(audio_bytes, output_file)
+        else:
+            self._open_with_system_player(output_file)
+    
+    def _play_bytes(self, audio_bytes: bytes, output_file: str):
+        """Play WAV data from memory, falling back to the file on playback errors."""
+        if self._player is None:
+            self._player = QMediaPlayer(self)
+            self._player.error.connect(self._playback_error)
+        self._player.stop()
+        
+        # Replace the previous buffer; the player reads from it while playing
+        if self._player_buffer is not None:
+            self._player_buffer.deleteLater()
+        self._player_buffer = QBuffer(self)
+        self._player_buffer.setData(QByteArray(audio_bytes))
+        self._player_buffer.open(QIODevice.ReadOnly)
+        self._player_file = output_file
+        
+        self._player.setMedia(QMediaContent(), self._player_buffer)
+        self._player.play()
+    
+    def _playback_error(self):
+        """Hand the file to the system player if in-memory playback fails."""
+        logger.warning(f"In-memory playback failed: {self._player.errorString()}")
+        self._open_with_system_player(self._player_file)
+    
+    def _open_with_system_player(self, output_file: str):
+        """Play an audio file with the operating system's default audio player."""
+        try:
+            _open_file(output_file)
+        except Exception as e:
+            QMessageBox.warning(
+                self, "Playback Error",
+                f"Failed to play audio file: {str(e)}"
+            )
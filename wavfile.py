@@ -0,0 +1,35 @@
+"""
+WAV header packing shared by the Piper TTS clients.
+
+Only the standard library is imported here, so the Docker client can use it
+without loading piper_utils and its optional dependencies.
+"""
+import struct
+
+# Header of a PCM WAV file: RIFF chunk, fmt chunk and data chunk header
+_WAV_HEADER = struct.Struct("<4sI4s4sIHHIIHH4sI")
+
+# Size of the header in bytes
+WAV_HEADER_SIZE = _WAV_HEADER.size
+
+
+def wav_header(data_size: int, sample_rate: int, width: int = 2, channels: int = 1) -> bytes:
+    """
+    Build the 44-byte header of a PCM WAV file.
+    
+    Args:
+        data_size: Size of the audio data in bytes
+        sample_rate: Sample rate in Hz
+        width: Bytes per sample (default: 2, for 16-bit audio)
+        channels: Number of channels (default: 1)
+    
+    Returns:
+        The packed header
+    """
+    block_align = channels * width
+    return _WAV_HEADER.pack(
+        b"RIFF", 36 + data_size, b"WAVE",
+        b"fmt ", 16, 1, channels, sample_rate, sample_rate * block_align,
+        block_align, 8 * width,
+        b"data", data_size
+    )